@@ -1,10 +1,25 @@
-import anthropic
 import ast
+import os
+import re
+from functools import lru_cache
 from typing import Dict, List, Union
 from pydantic import BaseModel
 
 
-client = anthropic.Anthropic(api_key="CLAUDE_API_KEY")
+# Regular expression pattern to match a fenced Python code block
+_CODE_BLOCK_PATTERN = re.compile(r"```python(.*?)```", re.DOTALL)
+
+@lru_cache(maxsize=1)
+def _get_client():
+    """
+    Create the Anthropic client on first use, so importing this module does not pull in the anthropic package.
+
+    Returns:
+        anthropic.Anthropic: The client, authenticated with the CLAUDE_API_KEY environment variable.
+    """
+    import anthropic
+
+    return anthropic.Anthropic(api_key=os.environ.get("CLAUDE_API_KEY"))
 
 class ContentBlock(BaseModel):
     text: str
@@ -25,15 +40,12 @@ def extract_code_and_imports(content_block: ContentBlock) -> Dict[str, Union[str
     """
     code_text = content_block[0].text.strip()
 
-    # Find the start and end indices of the Python code block
-    start_index = code_text.find("```python")
-    end_index = code_text.find("```", start_index + len("```python"))
-
-    if start_index == -1 or end_index == -1:
+    # Extract the Python code block
+    match = _CODE_BLOCK_PATTERN.search(code_text)
+    if match is None:
         raise ValueError("Invalid Python code block in the content.")
 
-    # Extract the Python code block
-    code_text = code_text[start_index + len("```python"):end_index].strip()
+    code_text = match.group(1).strip()
 
     try:
         tree = ast.parse(code_text)
@@ -61,7 +73,10 @@ def ask_claude_code(user_query: str):
     # TODO Handle situation where the code is not returned at all
     # TODO Add feature that allows claude to return a list of tasks, attached to func names
 
-    message = client.messages.create(
+    client = _get_client()
+
+    # Stream the response so text is collected as it arrives rather than after the full message
+    with client.messages.stream(
         model="claude-3-opus-20240229",
         max_tokens=3900,
         temperature=0.5,
@@ -85,10 +100,15 @@ def ask_claude_code(user_query: str):
                 ]
             }
         ]
-    )
-    # print(f"Code Returned from Claude : {message.content}")
+    ) as stream:
+        chunks = []
+        for text in stream.text_stream:
+            chunks.append(text)
+
+    content = [ContentBlock(text="".join(chunks))]
+    # print(f"Code Returned from Claude : {content}")
     try:
-        return extract_code_and_imports(message.content)
+        return extract_code_and_imports(content)
     except Exception as e:
         print(f"Failed to parse the python code with exception : {e}")
-        return message.content
\ No newline at end of file
+        return content
\ No newline at end of file
@@ -1,7 +1,57 @@
-from typing import List
+from typing import Dict, List, Optional, Tuple
 from pathlib import Path
 import ast
-from return_py_object_info import get_object_dependencies
+import itertools
+from return_py_object_info import _DEF_TYPES, _iter_module_level_nodes
+
+# Node types for import statements
+_IMPORT_TYPES = (ast.Import, ast.ImportFrom)
+
+def _import_key(node: ast.stmt) -> Tuple[str, Tuple[Tuple[str, Optional[str]], ...], Optional[str], int]:
+    """
+    Build a hashable key identifying an import statement, so imports can be deduplicated without unparsing them.
+    """
+    names = tuple((alias.name, alias.asname) for alias in node.names)
+    return type(node).__name__, names, getattr(node, 'module', None), getattr(node, 'level', None) or 0
+
+def _import_bindings(body: List[ast.stmt]) -> Dict[str, List[ast.stmt]]:
+    """
+    Map each name bound by a top-level import in a module body to the single-alias import statements binding it.
+
+    A name can be bound by several imports, e.g. `import xml.dom` and `import xml.etree` both bind `xml`.
+    """
+    bindings = {}
+    for node in body:
+        if isinstance(node, ast.Import):
+            for alias in node.names:
+                bindings.setdefault(alias.asname or alias.name.split('.')[0], []).append(ast.Import(names=[alias]))
+        elif isinstance(node, ast.ImportFrom):
+            for alias in node.names:
+                if alias.name != '*':
+                    bindings.setdefault(alias.asname or alias.name, []).append(ast.ImportFrom(module=node.module, names=[alias], level=node.level))
+    return bindings
+
+def _remove_statement(tree: ast.Module, node: ast.stmt) -> None:
+    """
+    Remove a statement from the module-level body that holds it, leaving a pass in any block body it empties.
+    """
+    for parent in itertools.chain([tree], _iter_module_level_nodes(tree.body)):
+        for field_name, statements in ast.iter_fields(parent):
+            if isinstance(statements, list) and any(statement is node for statement in statements):
+                statements.remove(node)
+                if not statements and field_name == 'body' and parent is not tree:
+                    statements.append(ast.Pass())
+                return
+
+def _index_definitions(body: List[ast.stmt]) -> Dict[str, int]:
+    """
+    Map the names of the functions and classes in a module body to the index of their first definition.
+    """
+    name_to_index = {}
+    for index, node in enumerate(body):
+        if isinstance(node, _DEF_TYPES):
+            name_to_index.setdefault(node.name, index)
+    return name_to_index
 
 def move_objects(object_names: List[str], source_file_path: str, dest_file_path: str, remove_from_source: bool = False, position: str = None, handle_conflicts: str = 'overwrite') -> None:
     try:
@@ -10,112 +60,139 @@ def move_objects(object_names: List[str], source_file_path: str, dest_file_path:
         dest_file_path = Path(dest_file_path).resolve()
 
         # Read the contents of the source file
-        with open(source_file_path, 'r') as source_file:
-            source_code = source_file.read()
+        source_code = source_file_path.read_text(encoding='utf-8')
 
         # Parse the source code into an AST
         source_tree = ast.parse(source_code)
 
-        # Find the objects (functions and classes) to move and their import statements
-        object_nodes = []
+        # Find the objects (functions and classes) to move, the import statements inside them,
+        # and the module-level imports of the source file that they use.
+        # Objects defined inside module-level blocks such as if or try are found too,
+        # but function and class bodies are not searched.
+        # Every definition of a name is collected, so overload stubs move together with their implementation.
+        source_import_bindings = _import_bindings(source_tree.body)
+        wanted_names = set(object_names)
+        object_groups = {}
         import_nodes = []
-        for node in ast.walk(source_tree):
-            if (isinstance(node, ast.FunctionDef) or isinstance(node, ast.ClassDef)) and node.name in object_names:
-                object_nodes.append(node)
+        dependency_import_nodes = {}
+        for node in _iter_module_level_nodes(source_tree.body):
+            if isinstance(node, _DEF_TYPES) and node.name in wanted_names:
+                object_groups.setdefault(node.name, []).append(node)
                 # Find import statements used in the object
                 for child_node in ast.walk(node):
-                    if isinstance(child_node, ast.Import) or isinstance(child_node, ast.ImportFrom):
+                    if isinstance(child_node, _IMPORT_TYPES):
                         import_nodes.append(child_node)
+                    elif isinstance(child_node, ast.Name) and isinstance(child_node.ctx, ast.Load) and child_node.id in source_import_bindings:
+                        dependency_import_nodes.setdefault(child_node.id, source_import_bindings[child_node.id])
 
-        if len(object_nodes) != len(object_names):
-            missing_objects = set(object_names) - set(node.name for node in object_nodes)
+        missing_objects = wanted_names - set(object_groups)
+        if missing_objects:
             raise ValueError(f"Objects {missing_objects} not found in {source_file_path}.")
 
-        # Get the unique dependencies of the objects
-        unique_dependencies = get_object_dependencies(source_file_path, object_names)
-
         # Read the contents of the destination file (if it exists)
-        dest_code = ''
-        if dest_file_path.is_file():
-            with open(dest_file_path, 'r') as dest_file:
-                dest_code = dest_file.read()
+        try:
+            dest_code = dest_file_path.read_text(encoding='utf-8')
+        except FileNotFoundError:
+            dest_code = ''
 
         # Parse the destination code into an AST
         dest_tree = ast.parse(dest_code)
 
-        # Process each object to move
-        for object_node in object_nodes:
-            object_name = object_node.name
+        # Collect the keys of the import statements already in the destination file
+        existing_import_keys = {_import_key(node) for node in dest_tree.body if isinstance(node, _IMPORT_TYPES)}
+
+        # Index the functions and classes already in the destination file by name.
+        # Inserts shift the positions of later nodes, so the index is rebuilt lazily when stale.
+        dest_name_to_index = _index_definitions(dest_tree.body)
+        dest_index_stale = False
 
+        # Process each object to move, placing all definitions of a name together in source order
+        objects_moved = False
+        for object_name, group_nodes in object_groups.items():
             # Check if the object already exists in the destination file
-            object_exists = any((isinstance(node, ast.FunctionDef) or isinstance(node, ast.ClassDef)) and node.name == object_name for node in dest_tree.body)
-            if object_exists:
+            if object_name in dest_name_to_index:
                 if handle_conflicts == 'rename':
                     # Rename the object to avoid conflicts
                     new_object_name = f"{object_name}_moved"
-                    object_node.name = new_object_name
+                    for object_node in group_nodes:
+                        object_node.name = new_object_name
                     print(f"Object '{object_name}' renamed to '{new_object_name}' to avoid conflicts.")
                 elif handle_conflicts == 'overwrite':
-                    # Remove the existing object from the destination tree
-                    dest_tree.body = [node for node in dest_tree.body if not ((isinstance(node, ast.FunctionDef) or isinstance(node, ast.ClassDef)) and node.name == object_name)]
+                    # Remove every existing definition of the object (e.g. overload stubs) from the destination tree
+                    matching_indices = [index for index, node in enumerate(dest_tree.body) if isinstance(node, _DEF_TYPES) and node.name == object_name]
+                    for index in reversed(matching_indices):
+                        del dest_tree.body[index]
+                    del dest_name_to_index[object_name]
+                    dest_index_stale = True
                 elif handle_conflicts == 'skip':
                     print(f"Object '{object_name}' already exists in {dest_file_path}. Skipping...")
                     continue
                 else:
                     raise ValueError(f"Invalid value for handle_conflicts: {handle_conflicts}")
 
-            # Add the necessary import statements to the destination tree
-            for import_node in import_nodes:
-                if not any(ast.unparse(node) == ast.unparse(import_node) for node in dest_tree.body):
-                    dest_tree.body.insert(0, import_node)
-
-            # Add import statements for the unique dependencies
-            for dependency in unique_dependencies:
-                import_stmt = ast.Import(names=[ast.alias(name=dependency)])
-                if not any(ast.unparse(node) == ast.unparse(import_stmt) for node in dest_tree.body):
-                    dest_tree.body.insert(0, import_stmt)
-
-            # Determine the position to add the object node
+            # Determine the position to add the object nodes
             if position is None or position == 'bottom':
-                # Add the object node to the end of the destination tree
-                dest_tree.body.append(object_node)
+                # Add the object nodes to the end of the destination tree
+                object_index = len(dest_tree.body)
             elif position == 'top':
-                # Add the object node to the beginning of the destination tree
-                dest_tree.body.insert(0, object_node)
+                # Add the object nodes to the beginning of the destination tree
+                object_index = 0
             else:
                 # Find the specified function or class in the destination tree
-                target_node = None
-                for node in dest_tree.body:
-                    if (isinstance(node, ast.FunctionDef) or isinstance(node, ast.ClassDef)) and node.name == position:
-                        target_node = node
-                        break
+                if dest_index_stale:
+                    dest_name_to_index = _index_definitions(dest_tree.body)
+                    dest_index_stale = False
+                target_index = dest_name_to_index.get(position)
 
-                if target_node is None:
+                if target_index is None:
                     print(f"Target '{position}' not found in {dest_file_path}. Adding object at the end.")
-                    dest_tree.body.append(object_node)
+                    object_index = len(dest_tree.body)
                 else:
-                    # Add the object node after the target node
-                    target_index = dest_tree.body.index(target_node)
-                    dest_tree.body.insert(target_index + 1, object_node)
+                    # Add the object nodes after the target node
+                    object_index = target_index + 1
+
+            # Appending at the end keeps the indices of existing nodes valid; any other insert shifts them
+            if object_index != len(dest_tree.body):
+                dest_index_stale = True
+            dest_tree.body[object_index:object_index] = group_nodes
+            dest_name_to_index.setdefault(group_nodes[0].name, object_index)
 
             if remove_from_source:
-                # Remove the object node from the source tree
-                source_tree.body.remove(object_node)
+                # Remove the object nodes from the source tree
+                for object_node in group_nodes:
+                    _remove_statement(source_tree, object_node)
+
+            objects_moved = True
+
+        if objects_moved:
+            # Add the necessary import statements to the destination tree
+            for import_node in import_nodes:
+                import_key = _import_key(import_node)
+                if import_key not in existing_import_keys:
+                    existing_import_keys.add(import_key)
+                    dest_tree.body.insert(0, import_node)
+
+            # Add the module-level imports of the source file that the objects use
+            for import_stmt in itertools.chain.from_iterable(dependency_import_nodes.values()):
+                import_key = _import_key(import_stmt)
+                if import_key not in existing_import_keys:
+                    existing_import_keys.add(import_key)
+                    dest_tree.body.insert(0, import_stmt)
 
-        # Generate the modified destination code
-        modified_dest_code = ast.unparse(dest_tree)
+        # Only rewrite the files when an object was actually moved, since skipped objects leave both trees untouched
+        if objects_moved:
+            # Generate the modified destination code
+            modified_dest_code = ast.unparse(dest_tree)
 
-        # Write the modified destination code to the destination file
-        with open(dest_file_path, 'w') as dest_file:
-            dest_file.write(modified_dest_code)
+            # Write the modified destination code to the destination file
+            dest_file_path.write_text(modified_dest_code, encoding='utf-8')
 
-        if remove_from_source:
+        if remove_from_source and objects_moved:
             # Generate the modified source code
             modified_source_code = ast.unparse(source_tree)
 
             # Write the modified source code back to the source file
-            with open(source_file_path, 'w') as source_file:
-                source_file.write(modified_source_code)
+            source_file_path.write_text(modified_source_code, encoding='utf-8')
 
         print(f"Objects {object_names} moved successfully from {source_file_path} to {dest_file_path}.")
 
@@ -1,12 +1,33 @@
+"""
+Collect metadata about the functions and classes defined in a Python file.
+
+Performance note: the work here is CPython ast.AST and inspect object traversal, not numeric
+array code, so Numba is not applicable. Parsing and module loading are cached per file instead.
+"""
 import inspect
+import importlib.util
+import hashlib
 import ast
+import os
 import sys
 import re
-from typing import Tuple, List,Dict, Union, Any, Optional, Literal, Type, Callable
+from typing import Tuple, List,Dict, Union, Any, Optional, Literal, Type, Callable, Iterable, Iterator
 from pathlib import Path
+from types import ModuleType
 import traceback
 from returns.result import Result, Success, Failure
-from functools import wraps
+from functools import wraps, lru_cache
+
+# Regular expression pattern to match primary function and class definitions
+# Bytes \w only matches ASCII, so any non-ASCII byte is accepted too for UTF-8 encoded identifiers
+_PRIMARY_DEF_PATTERN = re.compile(rb"^(?P<kind>def|class)\s+(?P<name>[\w\x80-\xff]+)", re.MULTILINE)
+
+# Node types for user-defined top-level objects
+_DEF_TYPES = (ast.FunctionDef, ast.ClassDef)
+
+# Node types whose bodies open a new scope, and the child node types of module-level blocks that hold statements
+_SCOPE_TYPES = _DEF_TYPES + (ast.AsyncFunctionDef,)
+_BLOCK_CHILD_TYPES = (ast.stmt, ast.excepthandler, ast.match_case)
 
 class ExceptionWithDict(Exception):
     def __init__(self, exception_dict: Dict[str, Any], original_exception: Exception):
@@ -52,6 +73,114 @@ def exception_handler(func: Callable) -> Callable:
 
     return wrapper
 
+def _iter_module_level_nodes(nodes: Iterable[ast.AST]) -> Iterator[ast.AST]:
+    """
+    Yield the statements that run at module level, including those nested in blocks such as if, try or with.
+
+    Function and class bodies are not descended into, since their definitions are not module attributes.
+
+    Args:
+        nodes (Iterable[ast.AST]): The statements to walk, usually the body of an ast.Module.
+
+    Yields:
+        ast.AST: Each module-level statement or block node.
+    """
+    for node in nodes:
+        yield node
+        if not isinstance(node, _SCOPE_TYPES):
+            yield from _iter_module_level_nodes(child for child in ast.iter_child_nodes(node) if isinstance(child, _BLOCK_CHILD_TYPES))
+
+def _file_cache_key(file_path: Union[str, Path]) -> Tuple[str, int]:
+    """
+    Build the cache key for a file from its resolved path and modification time.
+
+    Args:
+        file_path (Union[str, Path]): The path to the file.
+
+    Returns:
+        Tuple[str, int]: The resolved path and its modification time in nanoseconds.
+    """
+    file_path = Path(file_path).resolve()
+    return str(file_path), file_path.stat().st_mtime_ns
+
+@lru_cache(maxsize=128)
+def _parse_file(file_path: str, mtime_ns: int) -> ast.Module:
+    """
+    Parse a Python file into an AST, caching the result until the file is modified.
+
+    Args:
+        file_path (str): The resolved path to the Python file.
+        mtime_ns (int): The file's modification time, used to invalidate the cache.
+
+    Returns:
+        ast.Module: The parsed module. Callers must treat it as read-only.
+    """
+    # Hand the raw bytes to the parser, which decodes them itself and honours any coding declaration
+    with open(file_path, 'rb') as file:
+        return ast.parse(file.read())
+
+@lru_cache(maxsize=128)
+def _get_object_nodes(file_path: str, mtime_ns: int) -> Dict[str, Union[ast.FunctionDef, ast.ClassDef]]:
+    """
+    Map the names of the module-level functions and classes in a Python file to their AST nodes.
+
+    Args:
+        file_path (str): The resolved path to the Python file.
+        mtime_ns (int): The file's modification time, used to invalidate the cache.
+
+    Returns:
+        Dict[str, Union[ast.FunctionDef, ast.ClassDef]]: A dictionary mapping object names to their nodes.
+    """
+    return {node.name: node for node in _iter_module_level_nodes(_parse_file(file_path, mtime_ns).body) if isinstance(node, _DEF_TYPES)}
+
+def _analysed_module_name(file_path: str) -> str:
+    """
+    Build the sys.modules name for an analysed file, derived from its full path so it never shadows other modules.
+
+    Args:
+        file_path (str): The resolved path to the Python file.
+
+    Returns:
+        str: The module name, made of the file's stem and a digest of its path.
+    """
+    path_digest = hashlib.sha1(file_path.encode('utf-8')).hexdigest()[:16]
+    return f"_analysed_{Path(file_path).stem}_{path_digest}"
+
+@lru_cache(maxsize=128)
+def _load_module(file_path: str, mtime_ns: int) -> ModuleType:
+    """
+    Load a Python file as a module from its path, caching the result until the file is modified.
+
+    Args:
+        file_path (str): The resolved path to the Python file.
+        mtime_ns (int): The file's modification time, used to invalidate the cache.
+
+    Returns:
+        ModuleType: The loaded module, registered in sys.modules under a name derived from its resolved path.
+
+    Raises:
+        ImportError: If no module spec can be created for the file, or the module name is taken by another file.
+    """
+    module_name = _analysed_module_name(file_path)
+
+    existing_module = sys.modules.get(module_name)
+    if existing_module is not None and getattr(existing_module, '__file__', None) != file_path:
+        raise ImportError(f"Module name '{module_name}' is already used by {getattr(existing_module, '__file__', None)}")
+
+    spec = importlib.util.spec_from_file_location(module_name, file_path)
+    if spec is None or spec.loader is None:
+        raise ImportError(f"Cannot load module '{module_name}' from {file_path}")
+
+    module = importlib.util.module_from_spec(spec)
+    sys.modules[module_name] = module
+    try:
+        spec.loader.exec_module(module)
+    except BaseException:
+        # Do not leave a partly initialised module behind, as importlib itself does
+        sys.modules.pop(module_name, None)
+        raise
+    return module
+
 def missing_funcs_in_get_meta_data(filepath: str = None) -> Dict[str, List[str]]:
     """
     Compare the functions and classes obtained from get_meta_data and get_functions_and_classes_regex.
@@ -91,23 +220,21 @@ def get_primary_functions_and_classes_regex(file_path: str) -> Tuple[List[str],
             - functions: A list of primary function names.
             - classes: A list of primary class names.
     """
-    with open(file_path, "r") as file:
-        content = file.read()
-
-    # Regular expression pattern to match primary function and class definitions
-    pattern = r"^(?:def|class)\s+(\w+)"
+    # Read the raw bytes in one call, bypassing the buffered io layer
+    fd = os.open(file_path, os.O_RDONLY)
+    try:
+        content = os.read(fd, os.fstat(fd).st_size)
+    finally:
+        os.close(fd)
 
-    matches = re.findall(pattern, content, re.MULTILINE)
     functions = []
     classes = []
 
-    for match in matches:
-        if match.islower():
-            # Function names are typically in lowercase
-            functions.append(match)
+    for match in _PRIMARY_DEF_PATTERN.finditer(content):
+        if match.group('kind') == b'class':
+            classes.append(match.group('name').decode())
         else:
-            # Class names are typically in PascalCase
-            classes.append(match)
+            functions.append(match.group('name').decode())
 
     return functions, classes
 
@@ -137,7 +264,7 @@ def get_meta_data(file_path: Union[str, Path], obj_names: Optional[List[str]] =
 
     module_name = file_path.stem
     try:
-        module = __import__(module_name)
+        module = _load_module(*_file_cache_key(file_path))
     except ImportError as e:
         raise ImportError(f"Failed to import module '{module_name}': {str(e)}") from e
 
@@ -173,16 +300,15 @@ def get_user_defined_objects(file_path: Union[str, Path]) -> Dict[str, str]:
     if isinstance(file_path, str):
         file_path = Path(file_path)
 
-    with open(file_path, 'r') as file:
-        tree = ast.parse(file.read())
+    tree = _parse_file(*_file_cache_key(file_path))
 
     objects = {}
-    for node in ast.walk(tree):
-        if isinstance(node, (ast.ClassDef, ast.FunctionDef)):
+    # Skip function and class bodies, whose definitions are not module attributes
+    for node in _iter_module_level_nodes(tree.body):
+        if isinstance(node, _DEF_TYPES):
             objects[node.name] = 'class' if isinstance(node, ast.ClassDef) else 'function'
 
-    module_name = file_path.stem
-    module = __import__(module_name)
+    module = _load_module(*_file_cache_key(file_path))
 
     filtered_objects = {}
     for obj_name, obj_type in objects.items():
@@ -225,9 +351,12 @@ def get_object_metadata(obj: Any, file_path: Path) -> Dict[str, Any]:
     # Get the object's type (class or function)
     meta_data['type'] = 'class' if inspect.isclass(obj) else 'function'
 
-    # Get the object's module name
+    # Get the object's module name, reporting objects of the analysed file under the file's own name
     if hasattr(obj, '__module__'):
-        meta_data['module'] = obj.__module__
+        if obj.__module__ == _analysed_module_name(str(Path(file_path).resolve())):
+            meta_data['module'] = Path(file_path).stem
+        else:
+            meta_data['module'] = obj.__module__
     else:
         meta_data['module'] = None
 
@@ -243,13 +372,17 @@ def get_object_metadata(obj: Any, file_path: Path) -> Dict[str, Any]:
 
     # Get the object's parameters and return type (if it's a function)
     if inspect.isfunction(obj):
-        meta_data['parameters'] = get_function_parameters(obj)
+        sig = inspect.signature(obj)
+        meta_data['parameters'] = get_function_parameters(obj, sig)
         meta_data['arg_spec'] = inspect.getfullargspec(obj)
-        meta_data['signature'] = inspect.signature(obj)
-        meta_data['return_type'] = get_function_return_type(obj)
-
-    # Get the object's dependencies
-    if meta_data['source_code']:
+        meta_data['signature'] = sig
+        meta_data['return_type'] = get_function_return_type(obj, sig)
+
+    # Get the object's dependencies, reusing the already-parsed node when available
+    object_node = _get_object_nodes(*_file_cache_key(file_path)).get(meta_data['name'])
+    if object_node is not None:
+        meta_data['dependencies'] = get_object_dependencies(obj, object_node)
+    elif meta_data['source_code']:
         meta_data['dependencies'] = get_object_dependencies(obj, meta_data['source_code'])
     else:
         meta_data['dependencies'] = None
@@ -276,19 +409,22 @@ def get_class_attributes(obj: Any) -> Dict[str, str]:
     return attributes
 
 
-def get_function_parameters(obj: Any) -> List[Dict[str, Any]]:
+def get_function_parameters(obj: Any, sig: Optional[inspect.Signature] = None) -> List[Dict[str, Any]]:
     """
     Get the parameters of a function object.
 
     Args:
         obj (Any): The function object.
+        sig (Optional[inspect.Signature], optional): A precomputed signature of the function.
+            If None, the signature is computed from obj. Defaults to None.
 
     Returns:
         List[Dict[str, Any]]: A list of dictionaries representing the function parameters.
     """
     parameters = []
     try:
-        sig = inspect.signature(obj)
+        if sig is None:
+            sig = inspect.signature(obj)
         for param_name, param in sig.parameters.items():
             param_info = {
                 'name': param_name,
@@ -301,54 +437,62 @@ def get_function_parameters(obj: Any) -> List[Dict[str, Any]]:
     return parameters
 
 
-def get_function_return_type(obj: Any) -> Optional[str]:
+def get_function_return_type(obj: Any, sig: Optional[inspect.Signature] = None) -> Optional[str]:
     """
     Get the return type of a function object.
 
     Args:
         obj (Any): The function object.
+        sig (Optional[inspect.Signature], optional): A precomputed signature of the function.
+            If None, the signature is computed from obj. Defaults to None.
 
     Returns:
         Optional[str]: The string representation of the return type, or None if not available.
     """
     try:
-        sig = inspect.signature(obj)
+        if sig is None:
+            sig = inspect.signature(obj)
         return_type = sig.return_annotation
         return str(return_type) if return_type != inspect.Signature.empty else None
     except (ValueError, TypeError):
         return None
 
 
-def get_object_dependencies(obj: Any, source_code: str) -> Dict[str, List[str]]:
+def get_object_dependencies(obj: Any, source_code: Union[str, ast.AST]) -> Dict[str, List[str]]:
     try:
-        tree = ast.parse(source_code)
+        tree = ast.parse(source_code) if isinstance(source_code, str) else source_code
         local_dependencies = set()
         imported_dependencies = set()
         stdlib_dependencies = set()
 
+        # Bind loop invariants to locals once rather than looking them up for every node
+        stdlib_module_names = sys.stdlib_module_names
+        Import, ImportFrom, Name, Load = ast.Import, ast.ImportFrom, ast.Name, ast.Load
+        obj_has_module = hasattr(obj, '__module__')
+        obj_module = sys.modules.get(obj.__module__) if obj_has_module else None
+
         for node in ast.walk(tree):
-            if isinstance(node, ast.Import):
+            if isinstance(node, Import):
                 for alias in node.names:
-                    if alias.name in sys.stdlib_module_names:
+                    if alias.name in stdlib_module_names:
                         stdlib_dependencies.add(alias.name)
                     else:
                         imported_dependencies.add(alias.name)
-            elif isinstance(node, ast.ImportFrom):
-                if node.module in sys.stdlib_module_names:
+            elif isinstance(node, ImportFrom):
+                if node.module in stdlib_module_names:
                     stdlib_dependencies.add(node.module)
                 else:
                     imported_dependencies.add(node.module)
-            elif isinstance(node, ast.Name) and isinstance(node.ctx, ast.Load):
-                if hasattr(obj, '__module__'):
-                    module = sys.modules.get(obj.__module__)
-                    if module and hasattr(module, node.id):
-                        attr = getattr(module, node.id)
+            elif isinstance(node, Name) and isinstance(node.ctx, Load):
+                if obj_has_module:
+                    if obj_module and hasattr(obj_module, node.id):
+                        attr = getattr(obj_module, node.id)
                         if inspect.ismodule(attr):
-                            if attr.__name__ in sys.stdlib_module_names:
+                            if attr.__name__ in stdlib_module_names:
                                 stdlib_dependencies.add(attr.__name__)
                             else:
                                 imported_dependencies.add(attr.__name__)
-                        elif (inspect.isfunction(attr) or inspect.isclass(attr)) and hasattr(attr, '__module__') and attr.__module__ == module.__name__:
+                        elif (inspect.isfunction(attr) or inspect.isclass(attr)) and hasattr(attr, '__module__') and attr.__module__ == obj_module.__name__:
                             local_dependencies.add(node.id)
                 elif hasattr(obj, node.id):
                     attr = getattr(obj, node.id)